@@ -6,13 +6,26 @@ import argparse
 import shutil
 import venv
 import tempfile
+import hashlib
+import json
+from detector_actions import build_detectors
 
-def create_and_setup_venv(venv_path):
-    """Create and set up a virtual environment with required packages."""
-    print(f"[+] Creating virtual environment at {venv_path}...")
-    # Create virtual environment
-    venv.create(venv_path, with_pip=True, clear=True)
+def get_required_packages():
+    """Return the packages installed into the build virtual environment."""
+    # pyyaml wheels ship the libyaml _yaml extension
+    packages = ["pyinstaller", "pexpect", "requests", "pyyaml", "pyahocorasick"]
+    if platform.system().lower() == "windows":
+        packages.append("pywin32")
+    return packages
+
+def get_venv_path(packages):
+    """Return a temp venv path keyed by Python version and package set."""
+    key = hashlib.sha256(repr(sorted(packages)).encode()).hexdigest()[:12]
+    version = f"{sys.version_info.major}{sys.version_info.minor}"
+    return os.path.join(tempfile.gettempdir(), f"vsxploit_venv_{version}_{key}")
 
+def create_and_setup_venv(venv_path, packages):
+    """Create and set up a virtual environment with required packages."""
     # Determine the Python executable in the virtual environment
     if platform.system().lower() == "windows":
         python_exec = os.path.join(venv_path, "Scripts", "python.exe")
@@ -21,6 +34,16 @@ def create_and_setup_venv(venv_path):
         python_exec = os.path.join(venv_path, "bin", "python")
         pip_exec = os.path.join(venv_path, "bin", "pip")
 
+    # Reuse a venv previously set up for the same package set
+    ready_marker = os.path.join(venv_path, ".ready")
+    if os.path.isfile(python_exec) and os.path.isfile(ready_marker):
+        print(f"[✓] Reusing virtual environment at {venv_path}")
+        return python_exec
+
+    print(f"[+] Creating virtual environment at {venv_path}...")
+    # Create virtual environment
+    venv.create(venv_path, with_pip=True, clear=False)
+
     if not os.path.isfile(python_exec):
         print(f"[X] Failed to find Python executable in virtual environment: {python_exec}")
         sys.exit(1)
@@ -30,17 +53,86 @@ def create_and_setup_venv(venv_path):
     subprocess.run([python_exec, "-m", "pip", "install", "--upgrade", "pip"], check=True)
 
     # Install required packages
-    packages = ["pyinstaller", "pexpect", "requests", "pyyaml"]
-    if platform.system().lower() == "windows":
-        packages.append("pywin32")
-
     print(f"[+] Installing packages: {', '.join(packages)}")
-    subprocess.run([pip_exec, "install"] + packages, check=True)
+    try:
+        # uv resolves and downloads in parallel, and skips .pyc compilation by default
+        subprocess.run([python_exec, "-m", "pip", "install", "uv"], check=True)
+        subprocess.run([python_exec, "-m", "uv", "pip", "install", "--python", python_exec] + packages, check=True)
+    except subprocess.CalledProcessError:
+        print("[!] uv install failed, falling back to pip")
+        # PyInstaller compiles its own bytecode, so skip pip's compile pass
+        subprocess.run([pip_exec, "install", "--no-compile"] + packages, check=True)
+
+    # Mark the venv complete so later runs can skip setup
+    with open(ready_marker, "w") as f:
+        f.write("\n".join(packages))
 
     print(f"[✓] Virtual environment set up successfully at {venv_path}")
     return python_exec
 
-def compile_python_script(script_name, target_os, target_arch, venv_python):
+def bake_yaml_caches(venv_python, yaml_files, out_dir):
+    """Pre-parse YAML files into (sha256, data) pickles so the frozen app can skip YAML parsing."""
+    os.makedirs(out_dir, exist_ok=True)
+    baked_files = []
+    for yaml_file in yaml_files:
+        name = os.path.splitext(os.path.basename(yaml_file))[0]
+        baked_files.append(os.path.join(out_dir, f"{name}.pkl"))
+
+    # Parse inside the venv so the pickles match the bundled interpreter and pyyaml
+    bake_script = (
+        "import hashlib, pickle, sys, yaml\n"
+        "for src, dst in zip(sys.argv[1::2], sys.argv[2::2]):\n"
+        "    with open(src, 'rb') as f:\n"
+        "        source = f.read()\n"
+        "    baked = (hashlib.sha256(source).hexdigest(), yaml.safe_load(source))\n"
+        "    with open(dst, 'wb') as f:\n"
+        "        pickle.dump(baked, f, protocol=5)\n"
+    )
+    args = []
+    for yaml_file, baked_file in zip(yaml_files, baked_files):
+        args.extend([yaml_file, baked_file])
+
+    print(f"[+] Baking YAML caches into {out_dir}")
+    subprocess.run([venv_python, "-c", bake_script] + args, check=True)
+    return baked_files
+
+def generate_detector_module(venv_python, detector_yaml, out_dir):
+    """Emit _detector_gen.py with the detector dispatch table resolved as constants."""
+    with open(detector_yaml, "rb") as f:
+        source_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    # Parse inside the venv like bake_yaml_caches, since pyyaml may be missing on the host
+    parse_script = (
+        "import json, sys, yaml\n"
+        "with open(sys.argv[1], 'rb') as f:\n"
+        "    json.dump(yaml.safe_load(f), sys.stdout)\n"
+    )
+    result = subprocess.run([venv_python, "-c", parse_script, detector_yaml], check=True, capture_output=True, text=True)
+    detectors = build_detectors(json.loads(result.stdout))
+
+    os.makedirs(out_dir, exist_ok=True)
+    module_path = os.path.join(out_dir, "_detector_gen.py")
+    with open(module_path, "w", encoding="utf-8") as f:
+        f.write("# Generated by compile.py from detector.yaml, do not edit\n")
+        f.write(f"SOURCE_SHA256 = {source_sha256!r}\n")
+        f.write("DETECTORS = [\n")
+        for detector in detectors:
+            f.write(f"    {detector!r},\n")
+        f.write("]\n")
+    print(f"[+] Generated detector table: {module_path}")
+    return module_path
+
+def get_build_key(input_files, build_options, packages):
+    """Hash everything that affects the PyInstaller output into a cache key."""
+    digest = hashlib.sha256()
+    for input_file in input_files:
+        with open(input_file, "rb") as f:
+            digest.update(f.read())
+    digest.update(sys.version.encode())
+    digest.update(repr((build_options, sorted(packages))).encode())
+    return digest.hexdigest()
+
+def compile_python_script(script_name, target_os, target_arch, venv_python, packages, mode="onedir", use_upx=True):
     """Compile the script using PyInstaller in the virtual environment."""
     # Validate the target OS
     if target_os.lower() not in ["windows", "linux", "darwin"]:
@@ -86,19 +178,43 @@ def compile_python_script(script_name, target_os, target_arch, venv_python):
             print(f"[X] YAML file not found: {yaml_file}")
             sys.exit(1)
 
-    # Clean previous build directories
-    for dir_name in ["dist", "build"]:
-        if os.path.exists(dir_name):
-            shutil.rmtree(dir_name)
-            print(f"[+] Cleaned directory: {dir_name}")
+    # Skip PyInstaller entirely when nothing that feeds the build has changed
+    build_key = get_build_key(
+        [script_name, config_yaml, detector_yaml, os.path.abspath(__file__), os.path.join(script_dir, "detector_actions.py")],
+        (target_os.lower(), target_arch.lower(), mode, use_upx),
+        packages
+    )
+    build_key_file = os.path.join("build", ".build-key")
+    executable_name = "main.exe" if target_os.lower() == "windows" else "main"
+    if mode == "onedir":
+        executable = os.path.join("dist", "main", executable_name)
+    else:
+        executable = os.path.join("dist", executable_name)
+    if os.path.isfile(build_key_file) and os.path.isfile(executable):
+        with open(build_key_file, "r") as f:
+            if f.read().strip() == build_key:
+                print(f"[✓] Inputs unchanged, reused cached build at {executable}")
+                return
+
+    # Clean the previous output; the work directory is kept so PyInstaller can reuse its analysis
+    if os.path.exists("dist"):
+        shutil.rmtree("dist")
+        print("[+] Cleaned directory: dist")
+
+    # Pre-parse config.yaml so the frozen app loads a pickle instead; detector.yaml
+    # is covered by the generated _detector_gen module below
+    baked_files = bake_yaml_caches(venv_python, [config_yaml], os.path.join("build", "yaml_cache"))
+
+    # Specialize the detector table into a module so the frozen app skips detector.yaml
+    generated_dir = os.path.abspath(os.path.join("build", "generated"))
+    generate_detector_module(venv_python, detector_yaml, generated_dir)
 
     # Build the PyInstaller command
     pyinstaller_command = [
         venv_python,
         "-m",
         "PyInstaller",
-        "--onefile",  # Create a single standalone executable
-        "--clean",  # Clean cache to avoid build issues
+        f"--{mode}",  # onedir avoids unpacking to a temp dir on every launch
         "--add-data", f"{config_yaml}{path_separator}.",  # Include config.yaml
         "--add-data", f"{detector_yaml}{path_separator}.",  # Include detector.yaml
         "--distpath", "dist",  # Output directory
@@ -106,17 +222,40 @@ def compile_python_script(script_name, target_os, target_arch, venv_python):
         "--specpath", "build",  # Spec file directory
         "--hidden-import", "pexpect",  # Essential for Linux/Darwin
         "--hidden-import", "requests",
-        "--hidden-import", "platform",
-        "--hidden-import", "os",
-        "--hidden-import", "datetime",
-        "--hidden-import", "subprocess",
         "--hidden-import", "yaml",  # Required for YAML loading
+        "--hidden-import", "yaml._yaml",  # libyaml C extension behind CSafeLoader
+        "--hidden-import", "ahocorasick",  # Keyword automaton for detectors
+        "--paths", generated_dir,  # Location of the generated _detector_gen module
+        "--hidden-import", "_detector_gen",  # Pre-resolved detector table
         "--hidden-import", "tarfile",  # Required for Linux/Darwin extraction
         "--hidden-import", "zipfile",  # Required for Windows extraction
-        "--hidden-import", "base64",
-        "--hidden-import", "re",
+        "--exclude-module", "tkinter",  # Unused stdlib modules that would otherwise be bundled
+        "--exclude-module", "unittest",
+        "--exclude-module", "test",
+        "--exclude-module", "pydoc_data",
+        "--exclude-module", "xml.etree.cElementTree",
+        "--exclude-module", "distutils",
+        "--optimize", "2",  # Bundle bytecode compiled with -OO (no docstrings)
     ]
 
+    # Include the pre-baked YAML pickles next to the YAMLs
+    for baked_file in baked_files:
+        pyinstaller_command.extend(["--add-data", f"{os.path.abspath(baked_file)}{path_separator}."])
+
+    # Compress bundled binaries with UPX when it is available
+    if use_upx:
+        upx_path = shutil.which("upx")
+        if upx_path:
+            pyinstaller_command.extend(["--upx-dir", os.path.dirname(upx_path)])
+        else:
+            print("[!] UPX not found on PATH, bundled binaries will not be compressed")
+    else:
+        pyinstaller_command.append("--noupx")
+
+    # Strip symbol tables from ELF/Mach-O binaries
+    if target_os.lower() != "windows":
+        pyinstaller_command.append("--strip")
+
     # Add Windows-specific hidden imports
     if target_os.lower() == "windows":
         pyinstaller_command.extend([
@@ -133,7 +272,9 @@ def compile_python_script(script_name, target_os, target_arch, venv_python):
     try:
         # Run the PyInstaller command
         subprocess.run(pyinstaller_command, check=True)
-        print(f"[✓] Compilation complete for {target_os} ({target_arch}). Executable created in the 'dist' directory.")
+        with open(build_key_file, "w") as f:
+            f.write(build_key)
+        print(f"[✓] Compilation complete for {target_os} ({target_arch}, {mode}). Executable created at {executable}.")
     except subprocess.CalledProcessError as e:
         print(f"[X] Compilation failed: {e}")
         sys.exit(1)
@@ -161,6 +302,20 @@ if __name__ == "__main__":
         help="Target architecture (x86 or x64)"
     )
 
+    parser.add_argument(
+        "--mode",
+        "-m",
+        default="onedir",
+        choices=["onefile", "onedir"],
+        help="PyInstaller bundle mode; onedir starts faster, onefile produces a single executable (default: onedir)"
+    )
+
+    parser.add_argument(
+        "--no-upx",
+        action="store_true",
+        help="Do not compress bundled binaries with UPX (use if antivirus flags UPX-packed files)"
+    )
+
     # Parse arguments
     args = parser.parse_args()
 
@@ -170,9 +325,10 @@ if __name__ == "__main__":
         print(f"[X] Script not found: {script_name}")
         sys.exit(1)
 
-    # Create virtual environment in a temporary directory
-    venv_path = os.path.join(tempfile.gettempdir(), "vscode_compile_venv")
-    python_exec = create_and_setup_venv(venv_path)
+    # Create (or reuse) a virtual environment in a temporary directory
+    packages = get_required_packages()
+    venv_path = get_venv_path(packages)
+    python_exec = create_and_setup_venv(venv_path, packages)
 
     # Compile the script
-    compile_python_script(script_name, args.operating_system, args.architecture, python_exec)
\ No newline at end of file
+    compile_python_script(script_name, args.operating_system, args.architecture, python_exec, packages, args.mode, not args.no_upx)
\ No newline at end of file
